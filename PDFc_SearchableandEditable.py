@@ -1,18 +1,109 @@
 import fitz  # PyMuPDF - only for reading
+import os
+
+# Tesseract's OpenMP threads oversubscribe the CPU once several Tesseract
+# processes run side by side, so keep each one single-threaded by default
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
 import pytesseract
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageStat
 
 # Set Tesseract OCR path
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 import io
-import os
 import sys
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, PageBreak
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 import tempfile
+from xml.sax.saxutils import escape
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import re
+import shlex
+import shutil
+import subprocess
+from collections import OrderedDict, deque
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+
+# Optional: tesserocr keeps one Tesseract instance loaded per worker process
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+log = logging.getLogger("pdfconverter")
+
+# Tesseract settings shared by every OCR entry point
+OCR_PSM = 6
+OCR_VARIABLES = {
+    'preserve_interword_spaces': '1',
+    'tessedit_char_blacklist': '|</>',
+    'tessedit_do_invert': '0',
+}
+OCR_CONFIG = f'--oem 3 --psm {OCR_PSM} ' + ' '.join(f'-c {name}={value}' for name, value in OCR_VARIABLES.items())
+
+# Pages handed to one Tesseract process at a time
+OCR_BATCH_SIZE = 8
+
+# OCR worker processes; set OCR_CONCURRENCY to share the machine with other jobs
+OCR_WORKERS = int(os.environ.get("OCR_CONCURRENCY", "0")) or os.cpu_count() or 1
+
+# Recent OCR results kept by pixel hash, so repeated pages anywhere in a document are recognized once
+OCR_CACHE_SIZE = 128
+
+# Text-only PDF styles
+PAGE_HEADING_STYLE = ParagraphStyle('PageHeading', fontName='Helvetica-Bold', fontSize=14, leading=17, spaceAfter=13)
+HEADER_STYLE = ParagraphStyle('Header', fontName='Helvetica-Bold', fontSize=12, leading=20, spaceAfter=10)
+BODY_STYLE = ParagraphStyle('Body', fontName='Helvetica', fontSize=11, leading=14, spaceAfter=7)
+
+# Background images in editable PDFs are rendered at most at this DPI
+DISPLAY_DPI = 150
+
+# Pass dpi=AUTO_DPI to pick the OCR resolution per page from a 72 DPI probe.
+# Edge-map spread below each threshold selects that DPI; busier pages get the maximum.
+AUTO_DPI = -1
+AUTO_DPI_STEPS = ((20, 150), (45, 200))
+AUTO_DPI_MAX = 300
+
+# Pages whose own text layer has more letters/digits than this are not OCR'd
+MIN_NATIVE_TEXT_CHARS = 50
+
+# Tesseract version from the last run, keyed by the binary's path and mtime
+TESSERACT_VERSION_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "pdfconverter", "tesseract_version.json")
+
+def _tesseract_version():
+    """Tesseract version, only spawning `tesseract --version` when the binary changed since the last run"""
+    path = shutil.which(pytesseract.pytesseract.tesseract_cmd)
+    if path is None:
+        raise pytesseract.TesseractNotFoundError()
+    binary = [path, os.stat(path).st_mtime_ns]
+    
+    try:
+        with open(TESSERACT_VERSION_CACHE, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['binary'] == binary:
+            return cached['version']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    
+    version = str(pytesseract.get_tesseract_version())
+    try:
+        os.makedirs(os.path.dirname(TESSERACT_VERSION_CACHE), exist_ok=True)
+        with open(TESSERACT_VERSION_CACHE, 'w', encoding='utf-8') as f:
+            json.dump({'binary': binary, 'version': version}, f)
+    except OSError:
+        pass
+    return version
 
 def check_dependencies():
     """Check if required packages are installed"""
@@ -26,15 +117,29 @@ def check_dependencies():
     
     try:
         import pytesseract
-        version = pytesseract.get_tesseract_version()
+        version = _tesseract_version()
         print(f"✅ Tesseract found: {version}")
     except Exception as e:
         missing.append("pytesseract/tesseract")
         print(f"❌ Tesseract issue: {e}")
     
+    if tesserocr is not None:
+        print(f"✅ tesserocr found: {tesserocr.tesseract_version().splitlines()[0]}")
+    else:
+        print("ℹ️  tesserocr not installed (pip install tesserocr to keep Tesseract loaded between pages)")
+    
     try:
-        from PIL import Image
+        import PIL
+        from PIL import features
         print("✅ PIL/Pillow found")
+        
+        # Pillow-SIMD releases carry a ".postN" suffix; stock Pillow works but resizes/converts slower
+        if ".post" in PIL.__version__:
+            print(f"✅ Pillow-SIMD build: {PIL.__version__}")
+        else:
+            print(f"ℹ️  Stock Pillow {PIL.__version__} (pip install pillow-simd for faster image ops)")
+        if features.check_feature("libjpeg_turbo"):
+            print("✅ libjpeg-turbo enabled")
     except ImportError:
         missing.append("Pillow")
     
@@ -44,6 +149,12 @@ def check_dependencies():
     except ImportError:
         missing.append("reportlab")
     
+    try:
+        import tqdm
+        print("✅ tqdm found")
+    except ImportError:
+        missing.append("tqdm")
+    
     if missing:
         print(f"\n❌ Missing packages: {', '.join(missing)}")
         print("\nInstall with:")
@@ -56,190 +167,464 @@ def check_dependencies():
                 print("pip install Pillow")
             elif pkg == "reportlab":
                 print("pip install reportlab")
+            elif pkg == "tqdm":
+                print("pip install tqdm")
         return False
     
     return True
 
-def extract_text_from_page(page, dpi=300):
-    """Extract text from a PDF page using OCR with improved settings"""
-    try:
-        # Convert page to high-quality image
+def _mb(path):
+    """File size in MB from a single stat call"""
+    return os.stat(path).st_size / (1 << 20)
+
+def _print_sizes(input_path, output_path):
+    """Report input and output sizes in a single log record"""
+    log.info(f"📊 Input size: {_mb(input_path):.1f} MB\n📊 Output size: {_mb(output_path):.1f} MB")
+
+def render_page_image(page, dpi=200, mat=None, grayscale=False):
+    """Render a PDF page to an RGB (or, with grayscale=True, "L") PIL image"""
+    if mat is None:
         mat = fitz.Matrix(dpi/72, dpi/72)
-        pix = page.get_pixmap(matrix=mat, alpha=False)
-        img_data = pix.tobytes("png")
-        
-        # Convert to PIL Image
-        image = Image.open(io.BytesIO(img_data))
-        
-        # Improve OCR accuracy with enhanced configuration
-        custom_config = r'--oem 3 --psm 6 -c preserve_interword_spaces=1 --dpi 300 -c tessedit_char_blacklist=|"</>" -c tessedit_do_invert=0'
-        text = pytesseract.image_to_string(image, config=custom_config, lang='eng')
-        
-        # Get word bounding boxes for better placement
-        boxes = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
-        
-        return text.strip(), image, boxes
+    mode = "L" if grayscale else "RGB"
+    pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY if grayscale else fitz.csRGB, alpha=False)
+    
+    # Read the raw samples directly - no PNG encode/decode round-trip.
+    # alpha=False guarantees tightly packed 1- or 3-byte samples, and samples_mv
+    # exposes them without PyMuPDF first copying the buffer into a bytes object.
+    return Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, 0, 1)
+
+def _choose_dpi(page):
+    """
+    Pick an OCR DPI for a page from a cheap 72 DPI probe.
+    Mostly blank pages and large print give a flat edge map and OCR fine at 150 DPI;
+    only dense, small text needs the full 300 DPI (2.25x the pixels of 200 DPI).
+    """
+    pix = page.get_pixmap(colorspace=fitz.csGRAY, alpha=False)
+    probe = Image.frombuffer("L", (pix.width, pix.height), pix.samples_mv, "raw", "L", 0, 1)
+    spread = ImageStat.Stat(probe.filter(ImageFilter.FIND_EDGES)).stddev[0]
+    
+    for limit, dpi in AUTO_DPI_STEPS:
+        if spread < limit:
+            return dpi
+    return AUTO_DPI_MAX
+
+def text_from_data(data):
+    """Rebuild plain text from image_to_data output: one line per OCR line, a blank line between paragraphs"""
+    parts = []
+    para_key = line_key = None
+    
+    for i, word in enumerate(data['text']):
+        word = str(word).strip()
+        if not word:
+            continue
+        
+        key = (data['page_num'][i], data['block_num'][i], data['par_num'][i])
+        if key + (data['line_num'][i],) != line_key:
+            if line_key is not None:
+                parts.append('\n\n' if key != para_key else '\n')
+            para_key, line_key = key, key + (data['line_num'][i],)
+        else:
+            parts.append(' ')
+        parts.append(word)
+    
+    return ''.join(parts)
+
+# Column layout of Tesseract's TSV output (the same fields image_to_data returns)
+TSV_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text')
+
+def parse_tsv(tsv):
+    """Split Tesseract TSV output into one image_to_data-style dict per page, keyed by page_num"""
+    pages = {}
+    
+    for row in tsv.splitlines():
+        fields = row.split('\t')
+        if len(fields) < len(TSV_COLUMNS) - 1 or fields[0] == 'level':
+            continue  # header or malformed row
+        fields += [''] * (len(TSV_COLUMNS) - len(fields))
+        
+        page_num = int(fields[1])
+        data = pages.setdefault(page_num, {column: [] for column in TSV_COLUMNS})
+        for column, value in zip(TSV_COLUMNS[:10], fields[:10]):
+            data[column].append(int(value))
+        data['conf'].append(float(fields[10]))
+        data['text'].append(fields[11])
     
+    return pages
+
+def get_native_text(page):
+    """Return the page's embedded text if it already has a usable text layer, else None"""
+    text = page.get_text("text").strip()
+    if len(re.sub(r'\W', '', text)) <= MIN_NATIVE_TEXT_CHARS:
+        return None
+    
+    # A text layer that is mostly symbols is usually a broken encoding or a bad earlier OCR
+    visible = re.sub(r'\s', '', text)
+    if sum(ch.isalpha() for ch in visible) / len(visible) <= 0.5:
+        return None
+    return text
+
+def get_native_boxes(page, dpi=200):
+    """Word boxes from the page's own text layer, in image_to_data layout and pixel units at dpi"""
+    zoom = dpi / 72
+    data = {column: [] for column in TSV_COLUMNS}
+    
+    for x0, y0, x1, y1, word, block_no, line_no, word_no in page.get_text("words"):
+        row = (5, 1, block_no + 1, 1, line_no + 1, word_no + 1,
+               int(x0 * zoom), int(y0 * zoom), int((x1 - x0) * zoom), int((y1 - y0) * zoom), 100.0, word)
+        for column, value in zip(TSV_COLUMNS, row):
+            data[column].append(value)
+    
+    return data
+
+def render_page_for_ocr(page, dpi=200, mat=None):
+    """Render a PDF page to a grayscale pixmap for OCR (runs in the main process)"""
+    if mat is None:
+        mat = fitz.Matrix(dpi/72, dpi/72)
+    # Tesseract works on luminance anyway; grayscale is a third of the RGB bytes
+    return page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY, alpha=False)
+
+def ocr_image_list(image_paths, dpi=200):
+    """
+    OCR several page images with a single Tesseract process.
+    Tesseract reads the images from a list file and reports every word as a TSV row
+    tagged with its image number, so the model is loaded once per batch instead of
+    once per page. Returns a (text, boxes) pair per image; boxes is None on failure.
+    """
+    if _tess_api is not None:
+        results = []
+        for image_path in image_paths:
+            try:
+                _tess_api.SetImageFile(image_path)
+                _tess_api.SetSourceResolution(dpi)
+                _tess_api.Recognize()
+                boxes = parse_tsv(_tess_api.GetTSVText(0)).get(1)
+                results.append((text_from_data(boxes), boxes) if boxes else ("", None))
+            except Exception as e:
+                log.warning(f"Error processing page: {e}")
+                results.append(("", None))
+        return results
+    
+    list_path = os.path.splitext(image_paths[0])[0] + "_list.txt"
+    with open(list_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(image_paths))
+    
+    cmd = [pytesseract.pytesseract.tesseract_cmd, list_path, 'stdout',
+           '-l', 'eng', '--dpi', str(dpi)] + shlex.split(OCR_CONFIG) + ['tsv']
+    
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
+        if result.returncode != 0:
+            log.warning(f"Error processing pages: {result.stderr.strip()[:100]}")
+        pages = parse_tsv(result.stdout)
     except Exception as e:
-        print(f"Error processing page: {e}")
-        return "", None, None
+        log.warning(f"Error processing pages: {e}")
+        pages = {}
+    
+    # One entry per image, even if Tesseract stopped early
+    results = []
+    for page_num in range(1, len(image_paths) + 1):
+        boxes = pages.get(page_num)
+        results.append((text_from_data(boxes), boxes) if boxes else ("", None))
+    return results
+
+# Per-process tesserocr handle, created by _init_worker when tesserocr is available
+_tess_api = None
+
+def _init_worker():
+    """Keep each worker's Tesseract single-threaded and, if possible, load it once for the worker's lifetime"""
+    global _tess_api
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    
+    if tesserocr is not None:
+        try:
+            _tess_api = tesserocr.PyTessBaseAPI(lang='eng', psm=OCR_PSM, variables=OCR_VARIABLES)
+        except Exception as e:
+            log.warning(f"tesserocr unavailable, using tesseract CLI: {e}")
+            _tess_api = None
+
+def ocr_document_pages(pdf_document, dpi=200, force_ocr=False):
+    """
+    OCR every page of an open document across all CPU cores.
+    Pages are rendered here while earlier batches are recognized by worker processes,
+    and (text, boxes, page_dpi) triples are yielded in page order, with boxes in
+    image_to_data layout at page_dpi (dpi itself, or _choose_dpi(page) for AUTO_DPI).
+    Pages that render to identical pixels (repeated covers, letter templates) are only
+    recognized once, as long as the earlier copy is among the last OCR_CACHE_SIZE results,
+    and pages that already carry a text layer use it instead of OCR (unless force_ocr).
+    """
+    total_pages = len(pdf_document)
+    if not total_pages:
+        return
+    
+    mat = None if dpi == AUTO_DPI else fitz.Matrix(dpi/72, dpi/72)
+    workers = min(OCR_WORKERS, total_pages)
+    batch_size = max(1, min(OCR_BATCH_SIZE, -(-total_pages // workers)))
+    
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        pending = deque()       # (future, image paths, digests) per submitted batch
+        page_digests = deque()  # (cache key, dpi) of every page not yet yielded
+        ocr_cache = {}          # pixel hash (or native page key) -> (text, boxes)
+        waiting = {}            # cache key -> number of entries in page_digests using it
+        recent = OrderedDict()  # pixel hash -> (text, boxes) of the last OCR_CACHE_SIZE recognized images
+        queued = set()
+        batch, batch_digests, batch_dpi = [], [], dpi
+        
+        def submit():
+            nonlocal batch, batch_digests
+            pending.append((executor.submit(ocr_image_list, batch, batch_dpi), batch, batch_digests))
+            batch, batch_digests = [], []
+            # Drop MuPDF's cached page resources so long documents don't accumulate them
+            fitz.TOOLS.store_shrink(100)
+        
+        def collect(pending_batch):
+            future, image_paths, digests = pending_batch
+            for digest, result in zip(digests, future.result()):
+                ocr_cache[digest] = recent[digest] = result
+                if len(recent) > OCR_CACHE_SIZE:
+                    recent.popitem(last=False)
+            # Page images are megabytes each; delete them (and the batch's list file) once recognized
+            list_path = os.path.splitext(image_paths[0])[0] + "_list.txt"
+            for path in image_paths + [list_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        def ready_pages():
+            while page_digests and page_digests[0][0] in ocr_cache:
+                key, page_dpi = page_digests.popleft()
+                text, boxes = ocr_cache[key]
+                # Drop results no queued page still needs; recent keeps a bounded copy for later repeats
+                waiting[key] -= 1
+                if not waiting[key]:
+                    del ocr_cache[key], waiting[key]
+                    queued.discard(key)
+                yield text, boxes, page_dpi
+        
+        def expect(key, page_dpi):
+            page_digests.append((key, page_dpi))
+            waiting[key] = waiting.get(key, 0) + 1
+        
+        for page_num, page in enumerate(pdf_document.pages()):
+            page_dpi = _choose_dpi(page) if dpi == AUTO_DPI else dpi
+            native_text = None if force_ocr else get_native_text(page)
+            if native_text is not None:
+                # Born-digital page: ~1 ms text extraction instead of seconds of OCR
+                expect(('native', page_num), page_dpi)
+                ocr_cache[('native', page_num)] = (native_text, get_native_boxes(page, page_dpi))
+            else:
+                pix = render_page_for_ocr(page, page_dpi, mat)
+                # Keyed with the DPI too, so boxes are never reused at another scale
+                digest = (hashlib.blake2b(pix.samples_mv, digest_size=16).digest(), page_dpi)
+                expect(digest, page_dpi)
+                
+                if digest in recent:
+                    # Seen earlier in the document: reuse that result instead of recognizing it again
+                    ocr_cache.setdefault(digest, recent[digest])
+                elif digest not in queued:
+                    # Tesseract gets one --dpi per batch
+                    if batch and page_dpi != batch_dpi:
+                        submit()
+                    batch_dpi = page_dpi
+                    queued.add(digest)
+                    image_path = os.path.join(temp_dir, f"page_{page_num:05d}.pgm")
+                    pix.save(image_path, output="pgm")
+                    batch.append(image_path)
+                    batch_digests.append(digest)
+                
+                # Don't keep the raster alive while this generator is suspended below
+                pix = None
+            
+            if batch and (len(batch) == batch_size or page_num == total_pages - 1):
+                submit()
+            
+            # Stay at most two batches per worker ahead of the consumer
+            while pending and (pending[0][0].done() or len(pending) > 2 * workers):
+                collect(pending.popleft())
+            yield from ready_pages()
+        
+        while pending:
+            collect(pending.popleft())
+            yield from ready_pages()
+
+def wrap_words(words, measure, max_width):
+    """
+    Greedy word wrap that measures each word once and keeps a running line width,
+    instead of re-measuring the whole candidate line for every added word
+    """
+    space_width = measure(' ')
+    lines = []
+    current_line = []
+    current_width = 0
+    
+    for word in words:
+        word_width = measure(word)
+        test_width = current_width + space_width + word_width if current_line else word_width
+        
+        if test_width < max_width:
+            current_line.append(word)
+            current_width = test_width
+        else:
+            if current_line:
+                lines.append(' '.join(current_line))
+            current_line = [word]
+            current_width = word_width
+    
+    if current_line:
+        lines.append(' '.join(current_line))
+    
+    return lines
+
+@functools.lru_cache(maxsize=32)
+def _get_font(font_size):
+    """Load the overlay font once per size instead of re-parsing the TTF on every page"""
+    try:
+        # Try to use a system font
+        return ImageFont.truetype("arial.ttf", font_size)
+    except:
+        try:
+            return ImageFont.load_default()
+        except:
+            return None
 
 def create_image_with_selectable_text(original_image, ocr_text, transparency=128):
     """
     Create an image with text overlay that can be saved as PDF
     """
     try:
-        # Create a copy of the original image
-        img_with_text = original_image.copy().convert('RGBA')
-        
-        # Create transparent overlay
-        overlay = Image.new('RGBA', img_with_text.size, (255, 255, 255, 0))
-        draw = ImageDraw.Draw(overlay)
+        # Draw straight onto an RGB copy; the RGBA draw mode alpha-blends each
+        # primitive, so only the text box is touched, not the whole page
+        img_with_text = original_image.convert('RGB')
+        draw = ImageDraw.Draw(img_with_text, 'RGBA')
         
         # Try to use a decent font
-        try:
-            # Try to use a system font
-            font_size = max(12, min(24, img_with_text.height // 40))
-            font = ImageFont.truetype("arial.ttf", font_size)
-        except:
-            try:
-                font = ImageFont.load_default()
-            except:
-                font = None
+        font_size = max(12, min(24, img_with_text.height // 40))
+        font = _get_font(font_size)
         
         if ocr_text and font:
-            # Split text into lines that fit the image
-            words = ocr_text.split()
-            lines = []
-            current_line = []
-            
-            for word in words:
-                test_line = ' '.join(current_line + [word])
-                if font and draw.textlength(test_line, font=font) < (img_with_text.width - 100):
-                    current_line.append(word)
-                else:
-                    if current_line:
-                        lines.append(' '.join(current_line))
-                    current_line = [word]
+            # Split text into lines that fit the image; OCR text repeats a lot of
+            # words, so each distinct word is only measured by FreeType once
+            word_width = functools.lru_cache(maxsize=None)(lambda text: draw.textlength(text, font=font))
+            lines = wrap_words(ocr_text.split(), word_width, img_with_text.width - 100)
             
-            if current_line:
-                lines.append(' '.join(current_line))
-            
-            # Draw text lines
-            y_pos = 50
+            # Keep the lines that fit above the bottom margin
             line_height = font_size + 5
+            lines = lines[:max(0, (img_with_text.height - 100) // line_height)]
             
-            for line in lines:
-                if y_pos + line_height < img_with_text.height - 50:
-                    # Semi-transparent background
-                    text_width = draw.textlength(line, font=font) if font else len(line) * 10
-                    draw.rectangle(
-                        [(50, y_pos - 2), (50 + text_width + 10, y_pos + line_height)],
-                        fill=(255, 255, 255, transparency)
-                    )
-                    
-                    # Black text
-                    draw.text((55, y_pos), line, font=font, fill=(0, 0, 0, 255))
-                    y_pos += line_height
-                else:
-                    break
+            if lines:
+                # One semi-transparent background behind the whole block
+                text_block = '\n'.join(lines)
+                left, top, right, bottom = draw.multiline_textbbox((55, 50), text_block, font=font, spacing=5)
+                draw.rectangle((50, 48, right + 5, bottom + 2), fill=(255, 255, 255, transparency))
+                
+                # Black text, all lines in one call
+                draw.multiline_text((55, 50), text_block, font=font, spacing=5, fill=(0, 0, 0))
         
-        # Combine images
-        final_image = Image.alpha_composite(img_with_text, overlay)
-        return final_image.convert('RGB')
+        return img_with_text
         
     except Exception as e:
-        print(f"Error creating text overlay: {e}")
+        log.warning(f"Error creating text overlay: {e}")
         return original_image.convert('RGB')
 
-def create_pdf_with_reportlab(input_pdf_path, output_pdf_path, dpi=200, add_text_overlay=True):
+def image_reader(image, lossless=False, quality=85):
+    """
+    Wrap a PIL image for drawImage via an in-memory JPEG (or PNG when lossless).
+    ReportLab embeds JPEG bytes as-is, instead of Flate-compressing the raw pixels.
+    """
+    buf = io.BytesIO()
+    if lossless:
+        image.save(buf, "PNG")
+    else:
+        image.save(buf, "JPEG", quality=quality, optimize=False)
+    buf.seek(0)
+    return ImageReader(buf)
+
+def create_pdf_with_reportlab(input_pdf_path, output_pdf_path, dpi=200, add_text_overlay=True, lossless=False,
+                              grayscale=False, force_ocr=False):
     """
     Create new PDF using ReportLab - completely avoids PyMuPDF text insertion issues
+    (pass lossless=True to embed page images as PNG instead of JPEG, and grayscale=True
+    for a third of the pixel data on black-and-white scans; dpi=AUTO_DPI picks it per page)
     """
     
     if not os.path.exists(input_pdf_path):
-        print(f"❌ Input file not found: {input_pdf_path}")
+        log.error(f"❌ Input file not found: {input_pdf_path}")
         return False
     
     try:
-        print(f"📖 Opening: {input_pdf_path}")
+        log.info(f"📖 Opening: {input_pdf_path}")
         
         # Open the PDF for reading only
         pdf_document = fitz.open(input_pdf_path)
         total_pages = len(pdf_document)
         
-        print(f"📄 Creating new PDF with ReportLab: {total_pages} pages...")
+        log.info(f"📄 Creating new PDF with ReportLab: {total_pages} pages...")
         
         # Create new PDF with ReportLab
         c = canvas.Canvas(output_pdf_path, pagesize=letter)
+        # With AUTO_DPI each page is rendered at the DPI it was OCR'd at, so boxes line up
+        mat = None if dpi == AUTO_DPI else fitz.Matrix(dpi/72, dpi/72)
+        layout_cache = {}  # (img_width, img_height) -> (scale, x, y, new_width, new_height)
         successful_pages = 0
         
-        for page_num in range(total_pages):
-            print(f"📝 Page {page_num + 1}/{total_pages}...", end=" ", flush=True)
-            
+        # OCR runs ahead in worker processes while pages are drawn here
+        pages = zip(pdf_document.pages(), ocr_document_pages(pdf_document, dpi, force_ocr))
+        pages = tqdm(pages, total=total_pages, desc="Pages", unit="page", mininterval=0.25)
+        for page_num, (page, (text, boxes, page_dpi)) in enumerate(pages):
             try:
-                page = pdf_document[page_num]
-                
-                # Get page dimensions
-                page_width = page.rect.width
-                page_height = page.rect.height
-                
-                # Extract text
-                text, original_image = extract_text_from_page(page, dpi)
+                original_image = render_page_image(page, page_dpi, mat, grayscale)
                 
                 if original_image:
                     # Create image with text overlay if requested
                     if add_text_overlay and text:
                         processed_image = create_image_with_selectable_text(original_image, text)
                     else:
-                        processed_image = original_image.convert('RGB')
-                    
-                    # Save image temporarily
-                    temp_image_path = f"temp_page_{page_num}.png"
-                    processed_image.save(temp_image_path, "PNG")
-                    
-                    # Calculate scaling to fit page
-                    img_width, img_height = processed_image.size
-                    scale_x = letter[0] / img_width
-                    scale_y = letter[1] / img_height
-                    scale = min(scale_x, scale_y) * 0.95  # 95% to leave margins
+                        processed_image = original_image
                     
-                    new_width = img_width * scale
-                    new_height = img_height * scale
-                    
-                    # Center on page
-                    x = (letter[0] - new_width) / 2
-                    y = (letter[1] - new_height) / 2
-                    
-                    # Add image to PDF
-                    c.drawImage(temp_image_path, x, y, width=new_width, height=new_height)
+                    # Calculate scaling to fit page, once per distinct image size
+                    img_size = processed_image.size
+                    if img_size not in layout_cache:
+                        img_width, img_height = img_size
+                        scale_x = letter[0] / img_width
+                        scale_y = letter[1] / img_height
+                        scale = min(scale_x, scale_y) * 0.95  # 95% to leave margins
+                        
+                        new_width = img_width * scale
+                        new_height = img_height * scale
+                        
+                        # Center on page
+                        x = (letter[0] - new_width) / 2
+                        y = (letter[1] - new_height) / 2
+                        layout_cache[img_size] = (scale, x, y, new_width, new_height)
+                    scale, x, y, new_width, new_height = layout_cache[img_size]
                     
-                    # Clean up temp file
-                    os.remove(temp_image_path)
+                    # Add image to PDF straight from memory
+                    c.drawImage(image_reader(processed_image, lossless), x, y, width=new_width, height=new_height)
                     
-                    # Add invisible text for searchability (ReportLab method)
-                    if text and not add_text_overlay:
-                        c.setFillColorRGB(1, 1, 1)  # White text (invisible)
-                        c.setFont("Helvetica", 1)   # Very small font
+                    # Add invisible text for searchability, placed over each word OCR found
+                    if text and boxes and not add_text_overlay:
+                        text_layer = c.beginText()
+                        text_layer.setTextRenderMode(3)  # Invisible but selectable
+                        
+                        for left, top, height, word in zip(boxes['left'], boxes['top'],
+                                                           boxes['height'], boxes['text']):
+                            word = str(word).strip()
+                            if word:
+                                # Map image pixels to the scaled, centered image on the page
+                                text_layer.setFont("Helvetica", max(height * scale, 1))
+                                text_layer.setTextOrigin(x + left * scale,
+                                                         y + new_height - (top + height) * scale)
+                                text_layer.textOut(word)
                         
-                        # Split text into chunks to avoid long lines
-                        words = text.split()
-                        for i in range(0, len(words), 20):
-                            chunk = ' '.join(words[i:i+20])
-                            text_y = y + new_height - (i//20 + 1) * 10
-                            if text_y > y:
-                                c.drawString(x + 5, text_y, chunk[:100])  # Limit length
+                        c.drawText(text_layer)
                     
                     successful_pages += 1
-                    print("✓")
-                else:
-                    print("○")
                 
                 # Move to next page
                 c.showPage()
                 
             except Exception as page_error:
-                print(f"✗ (Error: {str(page_error)[:30]})")
+                tqdm.write(f"✗ Page {page_num + 1}: {str(page_error)[:30]}")
                 c.showPage()  # Still create blank page
                 continue
         
@@ -247,58 +632,49 @@ def create_pdf_with_reportlab(input_pdf_path, output_pdf_path, dpi=200, add_text
         c.save()
         pdf_document.close()
         
-        print(f"✅ ReportLab PDF created successfully!")
-        print(f"📄 Successfully processed: {successful_pages}/{total_pages} pages")
+        log.info(f"✅ ReportLab PDF created successfully!")
+        log.info(f"📄 Successfully processed: {successful_pages}/{total_pages} pages")
         
         # Show file sizes
-        input_size = os.path.getsize(input_pdf_path) / (1024*1024)
-        output_size = os.path.getsize(output_pdf_path) / (1024*1024)
-        print(f"📊 Input size: {input_size:.1f} MB")
-        print(f"📊 Output size: {output_size:.1f} MB")
+        _print_sizes(input_pdf_path, output_pdf_path)
         
         return True
         
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log.error(f"❌ Error: {e}")
         return False
 
-def create_text_only_pdf_clean(input_pdf_path, output_pdf_path, dpi=200):
+def create_text_only_pdf_clean(input_pdf_path, output_pdf_path, dpi=200, force_ocr=False):
     """
     Create a clean text-only PDF using ReportLab with improved formatting
     """
     
     if not os.path.exists(input_pdf_path):
-        print(f"❌ Input file not found: {input_pdf_path}")
+        log.error(f"❌ Input file not found: {input_pdf_path}")
         return False
     
     try:
-        print(f"📖 Extracting text from: {input_pdf_path}")
+        log.info(f"📖 Extracting text from: {input_pdf_path}")
         
         # Open PDF for reading
         pdf_document = fitz.open(input_pdf_path)
         total_pages = len(pdf_document)
         
-        print(f"📄 Creating clean text PDF from {total_pages} pages...")
-        
-        # Create new PDF
-        c = canvas.Canvas(output_pdf_path, pagesize=letter)
-        page_width, page_height = letter
-        
-        # Define margins
-        left_margin = 72    # 1 inch in points
-        right_margin = page_width - 72
-        top_margin = page_height - 72
-        bottom_margin = 72
+        log.info(f"📄 Creating clean text PDF from {total_pages} pages...")
         
+        # Pages flow through Platypus: 1-inch margins, text wrapped and paginated by ReportLab
+        doc = SimpleDocTemplate(output_pdf_path, pagesize=letter,
+                                leftMargin=72, rightMargin=72, topMargin=72, bottomMargin=72)
+        story = []
         successful_pages = 0
         
-        for page_num in range(total_pages):
-            print(f"📝 Page {page_num + 1}/{total_pages}...", end=" ", flush=True)
+        pages = tqdm(ocr_document_pages(pdf_document, dpi, force_ocr), total=total_pages, desc="Pages", unit="page", mininterval=0.25)
+        for page_num, (text, _, _) in enumerate(pages):
+            # Every source page starts on a new output page
+            if page_num:
+                story.append(PageBreak())
             
             try:
-                page = pdf_document[page_num]
-                text, _ = extract_text_from_page(page, dpi)
-                
                 if text:
                     # Improved text cleaning and paragraph detection
                     paragraphs = []
@@ -323,12 +699,7 @@ def create_text_only_pdf_clean(input_pdf_path, output_pdf_path, dpi=200):
                     if current_para:
                         paragraphs.append(' '.join(current_para))
                     
-                    # Set up initial text formatting
-                    c.setFont("Helvetica-Bold", 14)
-                    c.drawString(left_margin, top_margin, f"Page {page_num + 1}")
-                    
-                    # Start text content below header
-                    y_pos = top_margin - 30
+                    story.append(Paragraph(f"Page {page_num + 1}", PAGE_HEADING_STYLE))
                     
                     for paragraph in paragraphs:
                         if not paragraph.strip():
@@ -337,282 +708,220 @@ def create_text_only_pdf_clean(input_pdf_path, output_pdf_path, dpi=200):
                         # Detect if paragraph might be a header
                         is_header = len(paragraph) < 60 and paragraph.isupper()
                         
-                        # Set appropriate font and size
-                        if is_header:
-                            c.setFont("Helvetica-Bold", 12)
-                            line_height = 20
-                        else:
-                            c.setFont("Helvetica", 11)
-                            line_height = 14
-                        
-                        # Split paragraph into lines that fit the page width
-                        words = paragraph.split()
-                        lines = []
-                        current_line = []
-                        
-                        for word in words:
-                            test_line = ' '.join(current_line + [word])
-                            # Use proper text width calculation
-                            text_width = c.stringWidth(test_line, c._fontname, c._fontsize)
-                            
-                            if text_width < (right_margin - left_margin):
-                                current_line.append(word)
-                            else:
-                                if current_line:
-                                    lines.append(' '.join(current_line))
-                                current_line = [word]
-                        
-                        if current_line:
-                            lines.append(' '.join(current_line))
-                        
-                        # Draw paragraph
-                        for line in lines:
-                            if y_pos > bottom_margin:
-                                c.drawString(left_margin, y_pos, line)
-                                y_pos -= line_height
-                            else:
-                                # Start new page if we run out of space
-                                c.showPage()
-                                c.setFont("Helvetica-Bold", 14)
-                                c.drawString(left_margin, top_margin, f"Page {page_num + 1} (continued)")
-                                y_pos = top_margin - 30
-                                c.setFont(c._fontname, c._fontsize)  # Restore font settings
-                                
-                        # Add paragraph spacing
-                        y_pos -= line_height * 0.5
+                        # OCR text is plain text, not Paragraph markup
+                        story.append(Paragraph(escape(paragraph), HEADER_STYLE if is_header else BODY_STYLE))
                     
                     successful_pages += 1
-                    print("✓")
-                else:
-                    print("○")
-                
-                c.showPage()
                 
             except Exception as page_error:
-                print(f"✗ ({str(page_error)[:20]})")
-                c.showPage()
+                tqdm.write(f"✗ Page {page_num + 1}: {str(page_error)[:20]}")
                 continue
         
-        c.save()
+        doc.build(story)
         pdf_document.close()
         
-        print(f"✅ Clean text PDF created!")
-        print(f"📄 Successfully processed: {successful_pages}/{total_pages} pages")
+        log.info(f"✅ Clean text PDF created!")
+        log.info(f"📄 Successfully processed: {successful_pages}/{total_pages} pages")
         
         # Show file sizes
-        input_size = os.path.getsize(input_pdf_path) / (1024*1024)
-        output_size = os.path.getsize(output_pdf_path) / (1024*1024)
-        print(f"📊 Input size: {input_size:.1f} MB")
-        print(f"📊 Output size: {output_size:.1f} MB")
+        _print_sizes(input_pdf_path, output_pdf_path)
         
         return True
         
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log.error(f"❌ Error: {e}")
         return False
 
-def extract_to_text_file(input_pdf_path, output_txt_path, dpi=200):
+def extract_to_text_file(input_pdf_path, output_txt_path, dpi=200, force_ocr=False):
     """
     Simple text extraction to .txt file
     """
     
     if not os.path.exists(input_pdf_path):
-        print(f"❌ Input file not found: {input_pdf_path}")
+        log.error(f"❌ Input file not found: {input_pdf_path}")
         return False
     
     try:
-        print(f"📖 Extracting text from: {input_pdf_path}")
+        log.info(f"📖 Extracting text from: {input_pdf_path}")
         
         pdf_document = fitz.open(input_pdf_path)
         total_pages = len(pdf_document)
         
-        print(f"📄 Extracting text from {total_pages} pages...")
+        log.info(f"📄 Extracting text from {total_pages} pages...")
         
-        all_text = []
         successful_pages = 0
         
-        for page_num in range(total_pages):
-            print(f"📝 Page {page_num + 1}/{total_pages}...", end=" ", flush=True)
-            
-            try:
-                page = pdf_document[page_num]
-                text, _ = extract_text_from_page(page, dpi)
-                
-                if text:
-                    all_text.append(f"\n{'='*50}")
-                    all_text.append(f"PAGE {page_num + 1}")
-                    all_text.append(f"{'='*50}\n")
-                    all_text.append(text)
-                    all_text.append("\n")
-                    successful_pages += 1
-                    print("✓")
-                else:
-                    print("○")
-                    
-            except Exception as page_error:
-                print(f"✗")
-                continue
+        # Stream each page straight to disk so memory stays flat on huge documents
+        with open(output_txt_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            pages = tqdm(ocr_document_pages(pdf_document, dpi, force_ocr), total=total_pages, desc="Pages", unit="page", mininterval=0.25)
+            for page_num, (text, _, _) in enumerate(pages):
+                try:
+                    if text:
+                        if successful_pages:
+                            f.write("\n")
+                        f.write(f"\n{'='*50}\nPAGE {page_num + 1}\n{'='*50}\n\n{text}\n\n")
+                        successful_pages += 1
+                        
+                except Exception as page_error:
+                    tqdm.write(f"✗ Page {page_num + 1}")
+                    continue
         
         pdf_document.close()
         
-        # Save text file
-        with open(output_txt_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(all_text))
-        
-        print(f"✅ Text file created: {output_txt_path}")
-        print(f"📄 Successfully extracted: {successful_pages}/{total_pages} pages")
+        log.info(f"✅ Text file created: {output_txt_path}")
+        log.info(f"📄 Successfully extracted: {successful_pages}/{total_pages} pages")
         
         # Show file size
         output_size = os.path.getsize(output_txt_path) / 1024
-        print(f"📊 Text file size: {output_size:.1f} KB")
+        log.info(f"📊 Text file size: {output_size:.1f} KB")
         
         return True
         
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log.error(f"❌ Error: {e}")
         return False
 
-def create_editable_pdf(input_pdf_path, output_pdf_path, dpi=300):
+def create_editable_pdf(input_pdf_path, output_pdf_path, dpi=300, force_ocr=False):
     """Create a fully editable PDF with properly embedded text"""
     
     if not os.path.exists(input_pdf_path):
-        print(f"❌ Input file not found: {input_pdf_path}")
+        log.error(f"❌ Input file not found: {input_pdf_path}")
         return False
     
     try:
-        print(f"� Processing: {input_pdf_path}")
+        log.info(f"� Processing: {input_pdf_path}")
         
         # Open the PDF for reading
         pdf_document = fitz.open(input_pdf_path)
         total_pages = len(pdf_document)
         
-        print(f"📄 Creating editable PDF with {total_pages} pages...")
+        log.info(f"📄 Creating editable PDF with {total_pages} pages...")
         
-        # Create temporary directory for intermediate files
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Process each page
-            page_paths = []
-            successful_pages = 0
-            
-            for page_num in range(total_pages):
-                print(f"📝 Page {page_num + 1}/{total_pages}...", end=" ", flush=True)
-                
-                try:
-                    page = pdf_document[page_num]
+        # Every page is drawn straight into the output canvas
+        c = canvas.Canvas(output_pdf_path)
+        # OCR needs the full DPI; the background only has to look right on screen
+        display_dpi = DISPLAY_DPI if dpi == AUTO_DPI else min(DISPLAY_DPI, dpi)
+        mat = fitz.Matrix(display_dpi/72, display_dpi/72)
+        space_widths = {}  # font size -> width of " " in Helvetica
+        successful_pages = 0
+        
+        # OCR runs ahead in worker processes while pages are drawn here
+        pages = zip(pdf_document.pages(), ocr_document_pages(pdf_document, dpi, force_ocr))
+        pages = tqdm(pages, total=total_pages, desc="Pages", unit="page", mininterval=0.25)
+        for page_num, (page, (text, boxes, page_dpi)) in enumerate(pages):
+            try:
+                if text and boxes:
+                    # Word boxes are in pixels at page_dpi, the DPI this page was OCR'd at
+                    image = render_page_image(page, display_dpi, mat)
                     
-                    # Extract text and get word positions
-                    text, image, boxes = extract_text_from_page(page, dpi)
+                    background = image_reader(image, quality=88)
+                    page_width = page.rect.width
+                    page_height = page.rect.height
                     
-                    if text and image and boxes:
-                        # Create new PDF page with reportlab
-                        temp_pdf = os.path.join(temp_dir, f"page_{page_num}.pdf")
-                        page_width = image.width * 72.0 / dpi
-                        page_height = image.height * 72.0 / dpi
-                        
-                        c = canvas.Canvas(temp_pdf, pagesize=(page_width, page_height))
-                        
-                        # Add background image
-                        temp_img = os.path.join(temp_dir, f"page_{page_num}.png")
-                        image.save(temp_img, "PNG")
-                        c.drawImage(temp_img, 0, 0, width=page_width, height=page_height)
-                        
-                        # Add text layer with precise positioning
-                        c.setFont("Helvetica", 10)
-                        
-                        # Process words with their positions
-                        for i in range(len(boxes['text'])):
-                            if boxes['conf'][i] > 0:  # Skip low confidence or empty text
-                                word = boxes['text'][i].strip()
-                                if word:
-                                    # Convert coordinates to PDF space
-                                    x = boxes['left'][i] * 72.0 / dpi
-                                    # Convert y-coordinate (PDF coordinates start from bottom)
-                                    y = page_height - (boxes['top'][i] + boxes['height'][i]) * 72.0 / dpi
-                                    
-                                    # Calculate font size based on the height of the word box
-                                    font_size = boxes['height'][i] * 72.0 / dpi
-                                    # Keep font size within reasonable bounds
-                                    font_size = max(min(font_size, 14), 8)
-                                    
-                                    # Set font and size
-                                    c.setFont("Helvetica", font_size)
-                                    
-                                    # Add small spacing between words
-                                    word_width = c.stringWidth(word, "Helvetica", font_size)
-                                    space_width = c.stringWidth(" ", "Helvetica", font_size)
-                                    
-                                    # Check if this is a new line by comparing y-coordinates with previous word
-                                    if i > 0:
-                                        prev_y = page_height - (boxes['top'][i-1] + boxes['height'][i-1]) * 72.0 / dpi
-                                        if abs(y - prev_y) < font_size/2:  # Same line
-                                            # Add space only if words are not too far apart
-                                            prev_x = boxes['left'][i-1] * 72.0 / dpi
-                                            prev_width = boxes['width'][i-1] * 72.0 / dpi
-                                            if (x - (prev_x + prev_width)) < space_width * 3:
-                                                x += space_width
-                                    
-                                    # Make text selectable and editable with improved spacing
-                                    c.setFillColorRGB(0, 0, 0, 1)  # Black text
-                                    c.drawString(x, y, word)
-                        
-                        c.save()
-                        page_paths.append(temp_pdf)
-                        successful_pages += 1
-                        print("✓")
-                    else:
-                        print("○")
-                
-                except Exception as e:
-                    print(f"✗ ({str(e)[:30]})")
-                    continue
+                    # Build the text layer with precise positioning, collected into one
+                    # text object so the page gets a single BT/ET block
+                    text_layer = c.beginText()
+                    text_layer.setFont("Helvetica", 10)
+                    text_layer.setFillColorRGB(0, 0, 0, 1)  # Black text
+                    last_font_size = 10
+                    
+                    # Process words with their positions; one pixel-to-point factor per page
+                    px_to_pt = 72.0 / page_dpi
+                    prev = None  # (OCR line, right edge) of the previous word placed
+                    lines = zip(boxes['block_num'], boxes['par_num'], boxes['line_num'])
+                    
+                    for line, left, top, width, height, conf, word in zip(lines, boxes['left'], boxes['top'], boxes['width'],
+                                                                          boxes['height'], boxes['conf'], boxes['text']):
+                        if conf > 0:  # Skip low confidence or empty text
+                            word = word.strip()
+                            if word:
+                                # Convert coordinates to PDF space
+                                x = left * px_to_pt
+                                # Convert y-coordinate (PDF coordinates start from bottom)
+                                y = page_height - (top + height) * px_to_pt
+                                
+                                # Calculate font size based on the height of the word box,
+                                # in whole points within reasonable bounds
+                                font_size = round(height * px_to_pt)
+                                font_size = max(min(font_size, 14), 8)
+                                
+                                # Set font and size only when it changes
+                                if font_size != last_font_size:
+                                    text_layer.setFont("Helvetica", font_size)
+                                    last_font_size = font_size
+                                
+                                # Add small spacing between words
+                                if font_size not in space_widths:
+                                    space_widths[font_size] = pdfmetrics.stringWidth(" ", "Helvetica", font_size)
+                                space_width = space_widths[font_size]
+                                
+                                # Tesseract already numbers lines, so compare that instead of y-coordinates
+                                if prev is not None:
+                                    prev_line, prev_right = prev
+                                    if line == prev_line:  # Same line
+                                        # Add space only if words are not too far apart
+                                        if (x - prev_right) < space_width * 3:
+                                            x += space_width
+                                prev = (line, (left + width) * px_to_pt)
+                                
+                                # Make text selectable and editable with improved spacing
+                                text_layer.setTextOrigin(x, y)
+                                text_layer.textOut(word)
+                    
+                    # Draw only now, so a page that fails above leaves nothing half-drawn on the canvas;
+                    # the output page matches the source page size
+                    c.setPageSize((page_width, page_height))
+                    c.drawImage(background, 0, 0, width=page_width, height=page_height)
+                    c.drawText(text_layer)
+                    c.showPage()
+                    successful_pages += 1
             
-            # Merge all pages into final PDF
-            if successful_pages > 0:
-                output_doc = fitz.open()
-                
-                for page_path in page_paths:
-                    try:
-                        temp_doc = fitz.open(page_path)
-                        output_doc.insert_pdf(temp_doc)
-                        temp_doc.close()
-                    except Exception as e:
-                        print(f"\nWarning: Could not process temporary file {page_path}: {e}")
-                        continue
-                
-                try:
-                    # Save with optimization for editability
-                    output_doc.save(output_pdf_path,
-                                  deflate=True,
-                                  clean=True,
-                                  ascii=False,
-                                  pretty=False)
-                except Exception as e:
-                    print(f"\n❌ Error saving final PDF: {e}")
-                    return False
-                finally:
-                    output_doc.close()
-                
-                print(f"\n✅ Created editable PDF successfully!")
-                print(f"📄 Processed {successful_pages}/{total_pages} pages")
-                
-                # Show file sizes
-                input_size = os.path.getsize(input_pdf_path) / (1024*1024)
-                output_size = os.path.getsize(output_pdf_path) / (1024*1024)
-                print(f"📊 Input size: {input_size:.1f} MB")
-                print(f"📊 Output size: {output_size:.1f} MB")
-                
-                return True
+            except Exception as e:
+                tqdm.write(f"✗ Page {page_num + 1}: {str(e)[:30]}")
+                continue
+        
+        # Write the final PDF
+        if successful_pages > 0:
+            try:
+                c.save()
+            except Exception as e:
+                log.error(f"❌ Error saving final PDF: {e}")
+                return False
+            
+            log.info(f"✅ Created editable PDF successfully!")
+            log.info(f"📄 Processed {successful_pages}/{total_pages} pages")
             
-            return False
+            # Show file sizes
+            _print_sizes(input_pdf_path, output_pdf_path)
             
+            return True
+        
+        return False
+        
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log.error(f"❌ Error: {e}")
         return False
     finally:
         if 'pdf_document' in locals():
             pdf_document.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create editable PDFs from scanned PDFs")
+    parser.add_argument("pdf", nargs="?", help="PDF to convert (default: pick from the current directory)")
+    parser.add_argument("-y", "--yes", action="store_true", help="don't prompt; use defaults")
+    args = parser.parse_args()
+    
+    # Prompts would block forever under cron/CI, so only ask on a terminal
+    interactive = sys.stdin.isatty() and not args.yes
+    
+    # Legacy Windows code pages can't encode the status emoji; don't let that kill a run
+    for stream in (sys.stdout, sys.stderr):
+        if hasattr(stream, "reconfigure"):
+            stream.reconfigure(errors="replace")
+    
+    # Progress messages from the converters go through one stderr handler
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     print("📝 Enhanced PDF Converter (Creates Editable PDFs)")
     print("=" * 55)
     
@@ -625,47 +934,65 @@ if __name__ == "__main__":
     current_dir = os.getcwd()
     print(f"\nCurrent directory: {current_dir}")
     
-    pdf_files = [f for f in os.listdir('.') if f.lower().endswith('.pdf') 
-                 and not f.startswith(('editable_', 'searchable_', 'overlay_'))]
-    
-    if not pdf_files:
-        print("❌ No PDF files found")
-        input_path = input("\nEnter path to PDF: ").strip().strip('"')
-        if input_path and os.path.exists(input_path):
-            selected_file = input_path
-        else:
+    if args.pdf:
+        if not os.path.exists(args.pdf):
             print("❌ File not found")
             sys.exit(1)
+        selected_file = args.pdf
     else:
-        print(f"\nFound {len(pdf_files)} PDF file(s):")
-        for i, pdf in enumerate(pdf_files, 1):
-            size_mb = os.path.getsize(pdf) / (1024*1024)
-            print(f"  {i}. {pdf} ({size_mb:.1f} MB)")
-        
-        if len(pdf_files) == 1:
-            selected_file = pdf_files[0]
+        # One directory pass collects names and sizes together, sorted once so the
+        # numbering is stable; listing and selection both index this list
+        with os.scandir('.') as entries:
+            pdf_entries = sorted((e.name, e.stat().st_size) for e in entries
+                                 if e.is_file() and e.name.lower().endswith('.pdf')
+                                 and not e.name.startswith(('editable_', 'searchable_', 'overlay_')))
+        pdf_files = [name for name, _ in pdf_entries]
+        
+        if not pdf_files:
+            print("❌ No PDF files found")
+            input_path = input("\nEnter path to PDF: ").strip().strip('"') if interactive else ""
+            if input_path and os.path.exists(input_path):
+                selected_file = input_path
+            else:
+                print("❌ File not found")
+                sys.exit(1)
         else:
-            choice = int(input(f"\nSelect PDF (1-{len(pdf_files)}): ")) - 1
-            selected_file = pdf_files[choice]
+            print(f"\nFound {len(pdf_files)} PDF file(s):")
+            for i, (pdf, size) in enumerate(pdf_entries, 1):
+                print(f"  {i}. {pdf} ({size / (1 << 20):.1f} MB)")
+            
+            if len(pdf_files) == 1:
+                selected_file = pdf_files[0]
+            elif interactive:
+                choice = int(input(f"\nSelect PDF (1-{len(pdf_files)}): ")) - 1
+                selected_file = pdf_files[choice]
+            else:
+                print("❌ Several PDFs found; pass the one to convert on the command line")
+                sys.exit(1)
     
     print(f"\n📄 Selected: {os.path.basename(selected_file)}")
     
     # Quality settings
-    quality = input("\nUse high quality processing? (y/n): ").strip().lower()
-    dpi = 300 if quality in ['y', 'yes'] else 200
+    quality = input("\nUse high quality processing? (y/n/auto): ").strip().lower() if interactive else "n"
+    if quality in ['a', 'auto']:
+        dpi = AUTO_DPI
+    else:
+        dpi = 300 if quality in ['y', 'yes'] else 200
     
-    base_name = os.path.splitext(os.path.basename(selected_file))[0]
-    output_file = f"editable_{base_name}.pdf"
+    # Write the result next to the input, even when the input is in another directory
+    selected_path = Path(selected_file)
+    output_file = str(selected_path.with_name(f"editable_{selected_path.stem}.pdf"))
     
     print(f"\n🚀 Creating editable PDF...")
     print(f"Input: {selected_file}")
     print(f"Output: {output_file}")
-    print(f"Quality: {dpi} DPI")
+    print(f"Quality: {'auto' if dpi == AUTO_DPI else dpi} DPI")
     
-    confirm = input("\nProceed? (y/n): ").strip().lower()
+    confirm = input("\nProceed? (y/n): ").strip().lower() if interactive else "y"
     if confirm in ['y', 'yes', '']:
         success = create_editable_pdf(selected_file, output_file, dpi)
         if success:
             print(f"\n🎉 Successfully created editable PDF: {output_file}")
     
-    input("\nPress Enter to exit...")
\ No newline at end of file
+    if interactive:
+        input("\nPress Enter to exit...")